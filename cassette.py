@@ -0,0 +1,216 @@
+import atexit
+import gzip
+import json
+import os
+import time
+from collections import defaultdict, deque
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from ytmusicapi import YTMusic
+
+CASSETTE_VERSION = 3
+
+# Query parameters that change between runs rather than between requests
+VOLATILE_PARAMS = {"key", "alt"}
+
+# Placeholder browser auth for replay; never sent anywhere. The visitor ID
+# stops YTMusic from fetching one, which the recording may not contain.
+REPLAY_AUTH = {
+    "Accept": "*/*",
+    "Authorization": "SAPISIDHASH replay",
+    "Content-Type": "application/json",
+    "X-Goog-AuthUser": "0",
+    "x-origin": "https://music.youtube.com",
+    "X-Goog-Visitor-Id": "replay",
+    "Cookie": "__Secure-3PAPISID=replay",
+}
+
+
+def add_cassette_args(parser):
+    """Add --record/--replay options to a script's argument parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record",
+        metavar="FILE",
+        help="Record API responses to a cassette file (e.g. run.json.gz)",
+    )
+    group.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Serve API responses from a cassette file instead of YouTube",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="Replay timing multiplier, 0 for no waiting (default: 1.0)",
+    )
+
+
+def request_key(method, url, kwargs):
+    """Build a stable lookup key for a request.
+
+    The API key/alt query parameters and the innertube "context" block
+    change between runs (client version, visitor data), so they are left
+    out. Continuation parameters (ctoken etc.) are kept.
+    """
+    parts = urlsplit(url)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query) if k not in VOLATILE_PARAMS
+    )
+
+    body = kwargs.get("json")
+    if body is None:
+        body = kwargs.get("data")
+    if isinstance(body, (str, bytes)):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k != "context"}
+    return json.dumps(
+        [method.upper(), parts.path, query, body, kwargs.get("params")],
+        sort_keys=True,
+    )
+
+
+def auth_secrets(auth_file):
+    """Collect credential strings from a browser.json so they can be scrubbed."""
+    with open(auth_file) as f:
+        headers = json.load(f)
+
+    secrets = []
+    for name, value in headers.items():
+        if name.lower() == "authorization":
+            secrets.extend(value.split())
+        elif name.lower() == "cookie":
+            for pair in value.split(";"):
+                secrets.append(pair.partition("=")[2].strip())
+
+    # Short values (flags, "0", etc.) would scrub unrelated text
+    return sorted({s for s in secrets if len(s) >= 8}, key=len, reverse=True)
+
+
+class RecordingSession(requests.Session):
+    """requests session that saves every response to a cassette on exit.
+
+    settings is saved with the responses, so scripts can store decisions
+    (e.g. timeouts) that a replay has to repeat to make the same requests.
+    """
+
+    def __init__(self, path, secrets=(), settings=None):
+        super().__init__()
+        self.path = path
+        self.secrets = list(secrets)
+        self.settings = {} if settings is None else settings
+        self.interactions = []
+        atexit.register(self.save)
+
+    def scrub(self, text):
+        for secret in self.secrets:
+            text = text.replace(secret, "<scrubbed>")
+        return text
+
+    def request(self, method, url, **kwargs):
+        start = time.monotonic()
+        response = super().request(method, url, **kwargs)
+        elapsed = time.monotonic() - start
+
+        key = request_key(method, url, kwargs)
+        self.interactions.append(
+            {
+                "key": self.scrub(key),
+                "elapsed": elapsed,
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type"),
+                "body": self.scrub(response.text),
+            }
+        )
+        return response
+
+    def save(self):
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": CASSETTE_VERSION,
+                    "settings": self.settings,
+                    "interactions": self.interactions,
+                },
+                f,
+            )
+
+
+class ReplaySession(requests.Session):
+    """requests session that serves responses from a cassette.
+
+    Repeated requests (e.g. re-fetching Liked Music during verification)
+    are served in recorded order. Running out of recorded responses means
+    the run diverged from the recording, so that is an error.
+    """
+
+    def __init__(self, path, speed=1.0, settings=None):
+        super().__init__()
+        self.speed = speed
+        self.responses = defaultdict(deque)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            cassette = json.load(f)
+        if cassette.get("version") != CASSETTE_VERSION:
+            raise SystemExit(f"Unsupported cassette version in {path}")
+
+        self.settings = {} if settings is None else settings
+        self.settings.update(cassette["settings"])
+
+        for interaction in cassette["interactions"]:
+            self.responses[interaction["key"]].append(interaction)
+
+    def request(self, method, url, **kwargs):
+        key = request_key(method, url, kwargs)
+        queue = self.responses.get(key)
+        if not queue:
+            raise SystemExit(
+                f"No recorded response left for {method} "
+                f"{urlsplit(url).path} in cassette:\n  {key}"
+            )
+        interaction = queue.popleft()
+
+        if self.speed > 0:
+            time.sleep(interaction["elapsed"] / self.speed)
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = interaction["body"].encode("utf-8")
+        if interaction["content_type"]:
+            response.headers["Content-Type"] = interaction["content_type"]
+        return response
+
+
+def open_ytmusic(
+    auth_file, record=None, replay=None, replay_speed=1.0, settings=None
+):
+    """Create a YTMusic client, optionally recording or replaying traffic.
+
+    settings (a dict) is saved into the cassette when recording, and filled
+    in from the cassette when replaying.
+    """
+    if replay:
+        if not os.path.exists(replay):
+            raise SystemExit(f"Missing cassette {replay}")
+        session = ReplaySession(replay, replay_speed, settings)
+        return YTMusic(json.dumps(REPLAY_AUTH), requests_session=session)
+
+    if not os.path.exists(auth_file):
+        raise SystemExit(
+            f"Missing {auth_file}. Run: ytmusicapi browser\n"
+            "See: https://ytmusicapi.readthedocs.io/en/stable/setup/browser.html"
+        )
+
+    if record:
+        session = RecordingSession(record, auth_secrets(auth_file), settings)
+        return YTMusic(auth_file, requests_session=session)
+
+    return YTMusic(auth_file)
@@ -1,10 +1,25 @@
 import argparse
+import json
+import math
 import os
+import statistics
 import time
 
 from rich.console import Console
 from rich.table import Table
-from ytmusicapi import LikeStatus, YTMusic
+from ytmusicapi import LikeStatus
+
+from cassette import add_cassette_args, open_ytmusic
+from library import (
+    add_library_args,
+    find_liked_playlist_id,
+    load_library_index,
+    print_library_table,
+    prompt_playlist,
+    record_playlist_tracks,
+    select_playlist,
+)
+from phase_timer import Profiler, add_profile_args
 
 # Parse CLI arguments
 parser = argparse.ArgumentParser(
@@ -33,35 +48,76 @@ parser.add_argument(
     action="store_true",
     help="Don't reverse playlist order (default: reverse for Spotify imports)",
 )
+parser.add_argument(
+    "--probe",
+    type=int,
+    default=0,
+    metavar="N",
+    help="Measure how long the first N likes take to show up in Liked Music",
+)
+parser.add_argument(
+    "--probe-timeout",
+    type=float,
+    default=30.0,
+    help="Give up probing a song after this many seconds (default: 30.0)",
+)
+parser.add_argument(
+    "--probe-interval",
+    type=float,
+    default=1.0,
+    help="Seconds between Liked Music polls while probing (default: 1.0)",
+)
+parser.add_argument(
+    "--verify-lag",
+    type=float,
+    default=None,
+    help="Wait this long and re-check before rolling back "
+    "(default: p90 from like_latency.json, else --delay)",
+)
+add_cassette_args(parser)
+add_library_args(parser, "playlist")
+add_profile_args(parser)
 args = parser.parse_args()
 
+console = Console()
+profiler = Profiler(console, args.profile, args.profile_stats)
+
 # Initialize YTMusic with browser auth (more reliable than OAuth)
 AUTH_FILE = "browser.json"
 
-if not os.path.exists(AUTH_FILE):
-    raise SystemExit(
-        f"Missing {AUTH_FILE}. Run: ytmusicapi browser\n"
-        "See: https://ytmusicapi.readthedocs.io/en/stable/setup/browser.html"
+# Options that decide which requests are made; replays reuse the recorded
+# ones so they make the same requests in the same order
+CONTROL_ARGS = ("batch_size", "max_retries", "no_reverse", "probe")
+cassette_settings = {}
+
+with profiler.phase("startup"):
+    yt = open_ytmusic(
+        AUTH_FILE,
+        args.record,
+        args.replay,
+        args.replay_speed,
+        cassette_settings,
     )
 
-yt = YTMusic(AUTH_FILE)
-console = Console()
-
+if args.replay:
+    for name, value in cassette_settings.get("args", {}).items():
+        setattr(args, name, value)
+else:
+    cassette_settings["args"] = {
+        name: getattr(args, name) for name in CONTROL_ARGS
+    }
 
-def get_liked_playlist_id(yt):
-    """Find the Liked Music playlist by name."""
-    playlists = yt.get_library_playlists(limit=None)
-    liked = next((p for p in playlists if p["title"] == "Liked Music"), None)
-    return liked["playlistId"] if liked else None
+# Measured like -> Liked Music latencies from previous --probe runs
+LATENCY_FILE = "like_latency.json"
 
 
-def verify_likes(yt, expected_tracks, start_idx, count):
+def verify_likes(yt, library, expected_tracks, start_idx, count):
     """Verify songs were added to Liked Music.
 
     Returns the index of the first song NOT found in Liked Music,
     or None if all songs were verified successfully.
     """
-    liked_id = get_liked_playlist_id(yt)
+    liked_id = find_liked_playlist_id(yt, library)
     if not liked_id:
         return (
             start_idx  # Liked Music playlist doesn't exist = nothing was added
@@ -79,8 +135,104 @@ def verify_likes(yt, expected_tracks, start_idx, count):
     return None  # All verified
 
 
+def probe_like_latency(
+    yt, liked_id, video_id, timeout, interval, profiler, max_polls=None
+):
+    """Poll Liked Music until a just-liked song shows up.
+
+    Returns (latency, polls): the seconds between rate_song returning and
+    the song being visible, or None if it didn't show up within the
+    timeout, and how many times Liked Music was fetched. Replays pass the
+    recorded poll count as max_polls instead of relying on the timeout.
+    """
+    start = time.monotonic()
+    polls = 0
+    while True:
+        liked_data = yt.get_playlist(liked_id, limit=25)
+        polls += 1
+        liked_video_ids = {
+            t.get("videoId") for t in liked_data.get("tracks", [])
+        }
+        elapsed = time.monotonic() - start
+        if video_id in liked_video_ids:
+            return elapsed, polls
+        if (max_polls is None and elapsed >= timeout) or polls == max_polls:
+            return None, polls
+        profiler.sleep(interval)
+
+
+def get_liked_video_ids(yt, library):
+    """Return the video IDs currently in Liked Music."""
+    liked_id = find_liked_playlist_id(yt, library)
+    if not liked_id:
+        return set()
+    liked_data = yt.get_playlist(liked_id, limit=None)
+    return {t.get("videoId") for t in liked_data.get("tracks", [])}
+
+
+def summarize_latencies(latencies):
+    """Summarize a list of probe latencies (in seconds)."""
+    ordered = sorted(latencies)
+    p90_idx = math.ceil(len(ordered) * 9 / 10) - 1
+    return {
+        "samples": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p90": ordered[p90_idx],
+        "max": ordered[-1],
+    }
+
+
+def report_probe(console, latencies, timeouts, save):
+    """Print the probe latency summary and save it to LATENCY_FILE.
+
+    Returns the p90 latency, or None if no likes became visible.
+    """
+    if not latencies:
+        console.print(
+            "\n[yellow]Probe: no likes became visible, "
+            "keeping current verify lag[/yellow]\n"
+        )
+        return None
+
+    summary = summarize_latencies(latencies)
+    console.print(
+        f"\n[cyan]Probe: {summary['samples']} samples, "
+        f"min {summary['min']:.2f}s, "
+        f"median {summary['median']:.2f}s, "
+        f"p90 {summary['p90']:.2f}s, "
+        f"max {summary['max']:.2f}s, "
+        f"{timeouts} timeouts[/cyan]"
+    )
+    # Replayed timings aren't real, so don't keep them
+    if not save:
+        console.print(f"[dim]Replaying, not saving to {LATENCY_FILE}[/dim]\n")
+        return summary["p90"]
+
+    with open(LATENCY_FILE, "w") as f:
+        json.dump(
+            {
+                "summary": summary,
+                "timeouts": timeouts,
+                "latencies": latencies,
+            },
+            f,
+            indent=4,
+        )
+    console.print(f"[dim]Saved to {LATENCY_FILE}[/dim]\n")
+    return summary["p90"]
+
+
+def load_verify_lag():
+    """Return the p90 latency from a previous probe, or None."""
+    if not os.path.exists(LATENCY_FILE):
+        return None
+    with open(LATENCY_FILE) as f:
+        return json.load(f).get("summary", {}).get("p90")
+
+
 def unlike_batch_with_verification(
-    yt, tracks, start_idx, count, delay, console
+    yt, library, tracks, start_idx, count, delay, console, profiler
 ):
     """Unlike a batch of songs and verify they were removed."""
     batch = tracks[start_idx : start_idx + count]
@@ -91,10 +243,10 @@ def unlike_batch_with_verification(
             video_id = track.get("videoId")
             if video_id:
                 yt.rate_song(video_id, LikeStatus.INDIFFERENT)
-                time.sleep(delay)
+                profiler.sleep(delay)
 
         # Verify songs were removed from Liked Music
-        liked_id = get_liked_playlist_id(yt)
+        liked_id = find_liked_playlist_id(yt, library)
         if not liked_id:
             console.print(
                 "[green]Rollback verified (Liked Music empty)[/green]"
@@ -115,44 +267,35 @@ def unlike_batch_with_verification(
         console.print(
             "[yellow]Rollback verification failed, retrying unlike...[/yellow]"
         )
-        time.sleep(delay)
-
-
-# Fetch all playlists
-playlists = yt.get_library_playlists(limit=None)
+        profiler.sleep(delay)
 
-# Display with rich table
-table = Table(title="Your Playlists")
-table.add_column("#", style="dim")
-table.add_column("Playlist Name")
-table.add_column("Songs", justify="right")
 
-for i, playlist in enumerate(playlists, 1):
-    table.add_row(str(i), playlist["title"], str(playlist.get("count", "?")))
-
-console.print(table)
-
-# Prompt user to select a playlist
-while True:
-    try:
-        choice = console.input("\nEnter playlist number to import from: ")
-        playlist_num = int(choice)
-        if 1 <= playlist_num <= len(playlists):
-            break
-        console.print(
-            f"[red]Please enter a number between 1 and {len(playlists)}[/red]"
+# Load cached playlists and select one by name/ID or from the table
+with profiler.phase("library fetch"):
+    # Recordings always fetch the library so replays can serve it
+    library = load_library_index(
+        yt,
+        refresh=args.refresh_library or bool(args.record),
+        cached=not args.replay,
+    )
+    if args.playlist:
+        selected_playlist = select_playlist(yt, console, library, args.playlist)
+if not args.playlist:
+    with profiler.phase("rendering", cpu_profile=True):
+        print_library_table(console, library)
+    with profiler.phase("prompt", interactive=True):
+        selected_playlist = prompt_playlist(
+            console, library, "Enter playlist number to import from"
         )
-    except ValueError:
-        console.print("[red]Please enter a valid number[/red]")
-
-selected_playlist = playlists[playlist_num - 1]
 console.print(
     f"\nFetching songs from: [bold]{selected_playlist['title']}[/bold]\n"
 )
 
 # Fetch all playlist tracks
-playlist_data = yt.get_playlist(selected_playlist["playlistId"], limit=None)
-tracks = playlist_data.get("tracks", [])
+with profiler.phase("playlist fetch"):
+    playlist_data = yt.get_playlist(selected_playlist["playlistId"], limit=None)
+    tracks = playlist_data.get("tracks", [])
+    record_playlist_tracks(console, library, selected_playlist, tracks)
 
 if not tracks:
     raise SystemExit("[red]No tracks found in this playlist[/red]")
@@ -163,137 +306,246 @@ if not args.no_reverse:
     tracks = list(reversed(tracks))
 
 # Detect duplicates
-seen_ids = {}
-duplicates = []
-for i, track in enumerate(tracks, 1):
-    video_id = track.get("videoId")
-    if video_id:
-        if video_id in seen_ids:
-            duplicates.append((i, track, seen_ids[video_id]))
-        else:
-            seen_ids[video_id] = i
-
-unique_count = len(seen_ids)
-
-if duplicates:
-    console.print(
-        f"Found [bold]{len(tracks)}[/bold] songs ([bold]{unique_count}[/bold] unique)\n"
-    )
-    dup_table = Table(title=f"Duplicates detected ({len(duplicates)})")
-    dup_table.add_column("#", style="dim", justify="right")
-    dup_table.add_column("Title")
-    dup_table.add_column("Artist")
-    dup_table.add_column("First at", style="dim", justify="right")
-
-    for idx, track, first_idx in duplicates:
-        title = track.get("title", "Unknown")
-        artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
-        dup_table.add_row(str(idx), title, artists, str(first_idx))
-
-    console.print(dup_table)
-    console.print(
-        f"\n[yellow]Note: Liked Music will contain {unique_count} songs "
-        f"(duplicates are only liked once)[/yellow]\n"
-    )
-else:
-    console.print(f"Found [bold]{len(tracks)}[/bold] songs to import\n")
+with profiler.phase("dedup", cpu_profile=True):
+    seen_ids = {}
+    duplicates = []
+    for i, track in enumerate(tracks, 1):
+        video_id = track.get("videoId")
+        if video_id:
+            if video_id in seen_ids:
+                duplicates.append((i, track, seen_ids[video_id]))
+            else:
+                seen_ids[video_id] = i
+
+    unique_count = len(seen_ids)
+
+with profiler.phase("rendering", cpu_profile=True):
+    if duplicates:
+        console.print(
+            f"Found [bold]{len(tracks)}[/bold] songs ([bold]{unique_count}[/bold] unique)\n"
+        )
+        dup_table = Table(title=f"Duplicates detected ({len(duplicates)})")
+        dup_table.add_column("#", style="dim", justify="right")
+        dup_table.add_column("Title")
+        dup_table.add_column("Artist")
+        dup_table.add_column("First at", style="dim", justify="right")
+
+        for idx, track, first_idx in duplicates:
+            title = track.get("title", "Unknown")
+            artists = ", ".join(
+                a["name"] for a in track.get("artists", []) if a
+            )
+            dup_table.add_row(str(idx), title, artists, str(first_idx))
 
-# Prompt for starting index
-while True:
-    try:
-        start_input = console.input("Start from song number [1]: ").strip()
-        if not start_input:
-            start_index = 1
-        else:
-            start_index = int(start_input)
-        if 1 <= start_index <= len(tracks):
-            break
+        console.print(dup_table)
         console.print(
-            f"[red]Please enter a number between 1 and {len(tracks)}[/red]"
+            f"\n[yellow]Note: Liked Music will contain {unique_count} songs "
+            f"(duplicates are only liked once)[/yellow]\n"
         )
-    except ValueError:
-        console.print("[red]Please enter a valid number[/red]")
+    else:
+        console.print(f"Found [bold]{len(tracks)}[/bold] songs to import\n")
+
+# Prompt for starting index
+with profiler.phase("prompt", interactive=True):
+    while True:
+        try:
+            start_input = console.input("Start from song number [1]: ").strip()
+            if not start_input:
+                start_index = 1
+            else:
+                start_index = int(start_input)
+            if 1 <= start_index <= len(tracks):
+                break
+            console.print(
+                f"[red]Please enter a number between 1 and {len(tracks)}[/red]"
+            )
+        except ValueError:
+            console.print("[red]Please enter a valid number[/red]")
 
 if start_index > 1:
     console.print(f"\nStarting from song {start_index}\n")
 
+# How long to wait before re-checking a failed verification. Whether a
+# re-check happens changes the requests made, so replays use the recorded lag
+verify_lag = args.verify_lag
+if args.replay:
+    verify_lag = cassette_settings.get("verify_lag", verify_lag)
+if verify_lag is None and not args.replay:
+    verify_lag = load_verify_lag()
+    if verify_lag is not None:
+        console.print(
+            f"[dim]Using measured verify lag of {verify_lag:.1f}s "
+            f"from {LATENCY_FILE}[/dim]\n"
+        )
+if verify_lag is None:
+    verify_lag = args.delay
+cassette_settings["verify_lag"] = verify_lag
+
 # Track committed state for verification (0-based index)
 start_idx = start_index - 1
 committed_index = start_idx
 
-# Like all songs with retry logic and batch verification
-i = start_idx
-while i < len(tracks):
-    track = tracks[i]
-    title = track.get("title", "Unknown")
-    artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
-    video_id = track.get("videoId")
-
-    if not video_id:
-        console.print(f"[yellow]Skipping {title} (no video ID)[/yellow]")
-        i += 1
-        continue
-
-    console.print(
-        f"[{i + 1}/{len(tracks)}] Liking: [bold]{title}[/bold] by {artists}"
-    )
+# Consistency probe state
+probe_latencies = []
+probe_timeouts = 0
+probe_liked_id = None
+probe_seen_ids = None  # Already liked; these would show up instantly
 
-    # Retry logic for rate_song
-    for attempt in range(args.max_retries):
-        try:
-            yt.rate_song(video_id, LikeStatus.LIKE)
-            break
-        except Exception as e:
-            if attempt == args.max_retries - 1:
-                console.print(
-                    f"[red]Failed after {args.max_retries} attempts: {e}[/red]"
-                )
-                raise SystemExit(1)
-            console.print(
-                f"[yellow]Retry {attempt + 1}/{args.max_retries}...[/yellow]"
-            )
-            time.sleep(args.delay)
+# Like all songs with retry logic and batch verification
+with profiler.phase("like loop"):
+    i = start_idx
+    while i < len(tracks):
+        track = tracks[i]
+        title = track.get("title", "Unknown")
+        artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
+        video_id = track.get("videoId")
 
-    time.sleep(args.delay)
-    i += 1
+        if not video_id:
+            console.print(f"[yellow]Skipping {title} (no video ID)[/yellow]")
+            i += 1
+            continue
 
-    # Verify batch when batch_size reached or at end of tracks
-    if (i - committed_index) >= args.batch_size or i == len(tracks):
-        batch_count = i - committed_index
         console.print(
-            f"\n[cyan]Verifying batch of {batch_count} songs...[/cyan]"
+            f"[{i + 1}/{len(tracks)}] Liking: [bold]{title}[/bold] by {artists}"
         )
 
-        first_failed = verify_likes(yt, tracks, committed_index, batch_count)
+        # Only probe songs that weren't already in Liked Music
+        probing = False
+        if len(probe_latencies) + probe_timeouts < args.probe:
+            if probe_seen_ids is None:
+                with profiler.phase("probe"):
+                    probe_seen_ids = get_liked_video_ids(yt, library)
+            probing = video_id not in probe_seen_ids
+            probe_seen_ids.add(video_id)
+
+        # Retry logic for rate_song
+        for attempt in range(args.max_retries):
+            try:
+                yt.rate_song(video_id, LikeStatus.LIKE)
+                break
+            except Exception as e:
+                if attempt == args.max_retries - 1:
+                    console.print(
+                        f"[red]Failed after {args.max_retries} attempts: {e}[/red]"
+                    )
+                    raise SystemExit(1)
+                console.print(
+                    f"[yellow]Retry {attempt + 1}/{args.max_retries}...[/yellow]"
+                )
+                profiler.sleep(args.delay)
+
+        # Measure how long this like takes to show up in Liked Music
+        if probing:
+            with profiler.phase("probe"):
+                if not probe_liked_id:
+                    probe_liked_id = find_liked_playlist_id(yt, library)
+                latency = None
+                if probe_liked_id:
+                    probe_polls = cassette_settings.setdefault(
+                        "probe_polls", []
+                    )
+                    max_polls = None
+                    if args.replay:
+                        max_polls = probe_polls.pop(0)
+                    latency, polls = probe_like_latency(
+                        yt,
+                        probe_liked_id,
+                        video_id,
+                        args.probe_timeout,
+                        args.probe_interval,
+                        profiler,
+                        max_polls,
+                    )
+                    if not args.replay:
+                        probe_polls.append(polls)
+            if latency is None:
+                probe_timeouts += 1
+                console.print(
+                    f"[yellow]Probe: not visible after {args.probe_timeout:.1f}s[/yellow]"
+                )
+            else:
+                probe_latencies.append(latency)
+                console.print(f"[dim]Probe: visible after {latency:.2f}s[/dim]")
+
+            if len(probe_latencies) + probe_timeouts == args.probe:
+                p90 = report_probe(
+                    console, probe_latencies, probe_timeouts, not args.replay
+                )
+                if p90 is not None and args.verify_lag is None:
+                    verify_lag = p90
+                if args.replay:
+                    verify_lag = cassette_settings.get(
+                        "probe_verify_lag", verify_lag
+                    )
+                cassette_settings["probe_verify_lag"] = verify_lag
+
+        profiler.sleep(args.delay)
+        i += 1
 
-        if first_failed is None:
-            committed_index = i
-            console.print(
-                f"[green]Verified! Committed up to song {i}/{len(tracks)}[/green]\n"
-            )
-        else:
-            console.print(
-                f"[red]Verification failed at song {first_failed + 1}![/red]"
-            )
+        # Verify batch when batch_size reached or at end of tracks
+        if (i - committed_index) >= args.batch_size or i == len(tracks):
+            batch_count = i - committed_index
             console.print(
-                f"[yellow]Rolling back songs {first_failed + 1} to {i}...[/yellow]"
+                f"\n[cyan]Verifying batch of {batch_count} songs...[/cyan]"
             )
 
-            # Unlike from the first failed song onward (with verification)
-            rollback_count = i - first_failed
-            unlike_batch_with_verification(
-                yt, tracks, first_failed, rollback_count, args.delay, console
-            )
+            with profiler.phase("verification"):
+                first_failed = verify_likes(
+                    yt, library, tracks, committed_index, batch_count
+                )
+
+                # Likes can take a while to show up, so re-check before
+                # rolling back
+                if first_failed is not None and verify_lag > 0:
+                    console.print(
+                        f"[yellow]Song {first_failed + 1} not visible yet, "
+                        f"re-checking in {verify_lag:.1f}s...[/yellow]"
+                    )
+                    profiler.sleep(verify_lag)
+                    first_failed = verify_likes(
+                        yt, library, tracks, committed_index, batch_count
+                    )
+
+            if first_failed is None:
+                committed_index = i
+                console.print(
+                    f"[green]Verified! Committed up to song {i}/{len(tracks)}[/green]\n"
+                )
+            else:
+                console.print(
+                    f"[red]Verification failed at song {first_failed + 1}![/red]"
+                )
+                console.print(
+                    f"[yellow]Rolling back songs {first_failed + 1} to {i}...[/yellow]"
+                )
 
-            # Commit up to the first failed song
-            committed_index = first_failed
+                # Unlike from the first failed song onward (with verification)
+                rollback_count = i - first_failed
+                with profiler.phase("rollback"):
+                    unlike_batch_with_verification(
+                        yt,
+                        library,
+                        tracks,
+                        first_failed,
+                        rollback_count,
+                        args.delay,
+                        console,
+                        profiler,
+                    )
+
+                # Commit up to the first failed song
+                committed_index = first_failed
 
-            console.print(
-                f"[yellow]Retrying from song {first_failed + 1}...[/yellow]\n"
-            )
+                console.print(
+                    f"[yellow]Retrying from song {first_failed + 1}...[/yellow]\n"
+                )
+
+                # Reset loop index to retry from first failed song
+                i = first_failed
 
-            # Reset loop index to retry from first failed song
-            i = first_failed
+# Short runs can finish before all N songs were probed; keep what we have
+if 0 < len(probe_latencies) + probe_timeouts < args.probe:
+    report_probe(console, probe_latencies, probe_timeouts, not args.replay)
 
 if duplicates:
     console.print(
@@ -0,0 +1,237 @@
+import difflib
+import hashlib
+import json
+import os
+import time
+
+from rich.table import Table
+
+LIBRARY_INDEX_FILE = "library_index.json"
+
+# Re-fetch the library once the cached index is older than this (seconds)
+LIBRARY_MAX_AGE = 60 * 60
+
+
+def add_library_args(parser, *names):
+    """Add playlist selection options to a script's argument parser.
+
+    Each name becomes a --NAME option taking a playlist name or ID.
+    """
+    for name in names:
+        parser.add_argument(
+            f"--{name}",
+            metavar="NAME_OR_ID",
+            help=f"Select the {name} by ID, name or close match "
+            "instead of picking from the library table",
+        )
+    parser.add_argument(
+        "--refresh-library",
+        action="store_true",
+        help=f"Re-fetch your playlists even if {LIBRARY_INDEX_FILE} is recent",
+    )
+
+
+def tracks_hash(tracks):
+    """Hash a playlist's video IDs (in order) to detect changes."""
+    video_ids = "\n".join(t.get("videoId") or "" for t in tracks)
+    return hashlib.sha1(video_ids.encode("utf-8")).hexdigest()[:16]
+
+
+def save_library_index(index):
+    """Write the index to disk, unless it isn't cached (e.g. replays)."""
+    if not index["cached"]:
+        return
+    with open(LIBRARY_INDEX_FILE, "w") as f:
+        json.dump(
+            {k: v for k, v in index.items() if k != "cached"}, f, indent=4
+        )
+
+
+def fetch_library_index(yt, cached=True):
+    """Fetch your playlists and cache them in the library index."""
+    playlists = yt.get_library_playlists(limit=None)
+
+    # Keep track hashes from earlier fetches of the same playlists
+    tracks = {}
+    if cached and os.path.exists(LIBRARY_INDEX_FILE):
+        with open(LIBRARY_INDEX_FILE) as f:
+            tracks = json.load(f).get("tracks", {})
+
+    index = {
+        "cached": cached,
+        "fetched_at": time.time(),
+        "playlists": [
+            {
+                "playlistId": p["playlistId"],
+                "title": p["title"],
+                "count": p.get("count"),
+            }
+            for p in playlists
+        ],
+        "tracks": {
+            p["playlistId"]: tracks[p["playlistId"]]
+            for p in playlists
+            if p["playlistId"] in tracks
+        },
+    }
+    save_library_index(index)
+    return index
+
+
+def load_library_index(yt, refresh=False, cached=True):
+    """Load the cached library index, fetching it if missing or stale.
+
+    With cached=False the library is always fetched and never written to
+    disk, so a replay sees exactly the recorded library.
+    """
+    if cached and not refresh and os.path.exists(LIBRARY_INDEX_FILE):
+        with open(LIBRARY_INDEX_FILE) as f:
+            index = json.load(f)
+        if time.time() - index["fetched_at"] < LIBRARY_MAX_AGE:
+            return dict(index, cached=True)
+    return fetch_library_index(yt, cached)
+
+
+def find_playlist(index, query):
+    """Find a playlist by ID, exact name, partial name or close match.
+
+    Returns None if nothing matches; exits if the query is ambiguous.
+    """
+    playlists = index["playlists"]
+    by_id = {p["playlistId"]: p for p in playlists}
+    if query in by_id:
+        return by_id[query]
+
+    wanted = query.casefold()
+    candidates = [p for p in playlists if p["title"].casefold() == wanted]
+    if not candidates:
+        candidates = [p for p in playlists if wanted in p["title"].casefold()]
+    if not candidates:
+        titles = [p["title"].casefold() for p in playlists]
+        close = difflib.get_close_matches(wanted, titles, n=1)
+        if close:
+            candidates = [
+                p for p in playlists if p["title"].casefold() == close[0]
+            ]
+
+    if len(candidates) > 1:
+        names = "\n".join(
+            f"  {p['title']} ({p['playlistId']})" for p in candidates
+        )
+        raise SystemExit(
+            f"'{query}' matches {len(candidates)} playlists, "
+            f"use a more specific name or an ID:\n{names}"
+        )
+    return candidates[0] if candidates else None
+
+
+def select_playlist(yt, console, index, query):
+    """Find a playlist, re-fetching the library once if the cache misses.
+
+    Partial and close matches are printed, so a typo or an outdated name
+    doesn't silently pick a different playlist.
+    """
+    playlist = find_playlist(index, query)
+    if playlist is None:
+        index.update(fetch_library_index(yt, index["cached"]))
+        playlist = find_playlist(index, query)
+    if playlist is None:
+        raise SystemExit(f"No playlist matching '{query}'")
+
+    title = playlist["title"].casefold()
+    wanted = query.casefold()
+    if query != playlist["playlistId"] and title != wanted:
+        kind = "partial" if wanted in title else "close"
+        console.print(
+            f"[yellow]Using {kind} match '{playlist['title']}' "
+            f"({playlist['playlistId']}) for '{query}'[/yellow]"
+        )
+    return playlist
+
+
+def find_liked_playlist_id(yt, index):
+    """Find the Liked Music playlist ID in the index.
+
+    Liked Music only exists once something has been liked, so if the index
+    predates that, the library is re-fetched. Returns None if still missing.
+    """
+
+    def find_liked():
+        return next(
+            (
+                p["playlistId"]
+                for p in index["playlists"]
+                if p["playlistId"] == "LM" or p["title"] == "Liked Music"
+            ),
+            None,
+        )
+
+    liked_id = find_liked()
+    if liked_id is None:
+        index.update(fetch_library_index(yt, index["cached"]))
+        liked_id = find_liked()
+    return liked_id
+
+
+def record_playlist_tracks(console, index, playlist, tracks):
+    """Store the fetched track count and hash for a playlist in the index.
+
+    Warns if the playlist changed since it was last fetched, since song
+    numbers from an earlier run (e.g. a start position) may have shifted.
+    """
+    playlist_id = playlist["playlistId"]
+    current = {"count": len(tracks), "hash": tracks_hash(tracks)}
+    previous = index["tracks"].get(playlist_id)
+    if previous and previous["hash"] != current["hash"]:
+        console.print(
+            f"[yellow]Note: {playlist['title']} changed since it was last "
+            f"fetched ({previous['count']} -> {current['count']} songs)"
+            "[/yellow]"
+        )
+    index["tracks"][playlist_id] = current
+    for p in index["playlists"]:
+        if p["playlistId"] == playlist_id:
+            p["count"] = len(tracks)
+    save_library_index(index)
+
+
+def print_library_table(console, index):
+    """Display the library index as a numbered table."""
+    age = time.time() - index["fetched_at"]
+    table = Table(title="Your Playlists")
+    table.add_column("#", style="dim")
+    table.add_column("Playlist Name")
+    table.add_column("Songs", justify="right")
+    table.add_column("ID", style="dim")
+    if age >= 60:
+        table.caption = (
+            f"Cached {age / 60:.0f}m ago (refreshed after "
+            f"{LIBRARY_MAX_AGE // 60}m), use --refresh-library to update"
+        )
+
+    for i, playlist in enumerate(index["playlists"], 1):
+        count = playlist.get("count")
+        table.add_row(
+            str(i),
+            playlist["title"],
+            "?" if count is None else str(count),
+            playlist["playlistId"],
+        )
+
+    console.print(table)
+
+
+def prompt_playlist(console, index, prompt_text):
+    """Prompt user to select a playlist by number."""
+    playlists = index["playlists"]
+    while True:
+        try:
+            choice = console.input(f"\n{prompt_text}: ")
+            playlist_num = int(choice)
+            if 1 <= playlist_num <= len(playlists):
+                return playlists[playlist_num - 1]
+            console.print(
+                f"[red]Please enter a number between 1 and {len(playlists)}[/red]"
+            )
+        except ValueError:
+            console.print("[red]Please enter a valid number[/red]")
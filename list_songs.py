@@ -1,9 +1,18 @@
 import argparse
-import os
 
 from rich.console import Console
 from rich.table import Table
-from ytmusicapi import YTMusic
+
+from cassette import add_cassette_args, open_ytmusic
+from library import (
+    add_library_args,
+    load_library_index,
+    print_library_table,
+    prompt_playlist,
+    record_playlist_tracks,
+    select_playlist,
+)
+from phase_timer import Profiler, add_profile_args
 
 # Parse arguments
 parser = argparse.ArgumentParser(
@@ -12,55 +21,46 @@ parser = argparse.ArgumentParser(
 group = parser.add_mutually_exclusive_group()
 group.add_argument("--head", type=int, metavar="N", help="Show first N songs")
 group.add_argument("--tail", type=int, metavar="N", help="Show last N songs")
+add_cassette_args(parser)
+add_library_args(parser, "playlist")
+add_profile_args(parser)
 args = parser.parse_args()
 
-# Initialize YTMusic with browser auth
-AUTH_FILE = "browser.json"
-
-if not os.path.exists(AUTH_FILE):
-    raise SystemExit(
-        f"Missing {AUTH_FILE}. Run: ytmusicapi browser\n"
-        "See: https://ytmusicapi.readthedocs.io/en/stable/setup/browser.html"
-    )
-
-yt = YTMusic(AUTH_FILE)
-
-# Fetch all playlists
-playlists = yt.get_library_playlists(limit=None)
-
-# Display with rich table
 console = Console()
-table = Table(title="Your Playlists")
-table.add_column("#", style="dim")
-table.add_column("Playlist Name")
-table.add_column("Songs", justify="right")
+profiler = Profiler(console, args.profile, args.profile_stats)
 
-for i, playlist in enumerate(playlists, 1):
-    table.add_row(str(i), playlist["title"], str(playlist.get("count", "?")))
+# Initialize YTMusic with browser auth
+AUTH_FILE = "browser.json"
 
-console.print(table)
+with profiler.phase("startup"):
+    yt = open_ytmusic(AUTH_FILE, args.record, args.replay, args.replay_speed)
 
-# Prompt user to select a playlist
-while True:
-    try:
-        choice = console.input("\nEnter playlist number to view: ")
-        playlist_num = int(choice)
-        if 1 <= playlist_num <= len(playlists):
-            break
-        console.print(
-            f"[red]Please enter a number between 1 and {len(playlists)}[/red]"
+# Load cached playlists and select one by name/ID or from the table
+with profiler.phase("library fetch"):
+    # Recordings always fetch the library so replays can serve it
+    library = load_library_index(
+        yt,
+        refresh=args.refresh_library or bool(args.record),
+        cached=not args.replay,
+    )
+    if args.playlist:
+        selected_playlist = select_playlist(yt, console, library, args.playlist)
+if not args.playlist:
+    with profiler.phase("rendering", cpu_profile=True):
+        print_library_table(console, library)
+    with profiler.phase("prompt", interactive=True):
+        selected_playlist = prompt_playlist(
+            console, library, "Enter playlist number to view"
         )
-    except ValueError:
-        console.print("[red]Please enter a valid number[/red]")
-
-selected_playlist = playlists[playlist_num - 1]
 console.print(
     f"\nFetching songs from: [bold]{selected_playlist['title']}[/bold]\n"
 )
 
 # Fetch all playlist tracks
-playlist_data = yt.get_playlist(selected_playlist["playlistId"], limit=None)
-tracks = playlist_data.get("tracks", [])
+with profiler.phase("playlist fetch"):
+    playlist_data = yt.get_playlist(selected_playlist["playlistId"], limit=None)
+    tracks = playlist_data.get("tracks", [])
+    record_playlist_tracks(console, library, selected_playlist, tracks)
 
 if not tracks:
     raise SystemExit("[red]No tracks found in this playlist[/red]")
@@ -79,19 +79,20 @@ else:
     title_suffix = "all"
 
 # Display songs
-songs_table = Table(
-    title=f"{selected_playlist['title']} ({title_suffix} of {len(tracks)} songs)"
-)
-songs_table.add_column("#", style="dim")
-songs_table.add_column("Title")
-songs_table.add_column("Artist")
+with profiler.phase("rendering", cpu_profile=True):
+    songs_table = Table(
+        title=f"{selected_playlist['title']} ({title_suffix} of {len(tracks)} songs)"
+    )
+    songs_table.add_column("#", style="dim")
+    songs_table.add_column("Title")
+    songs_table.add_column("Artist")
 
-# Calculate starting index for display
-start_idx = len(tracks) - len(display_tracks) + 1 if args.tail else 1
+    # Calculate starting index for display
+    start_idx = len(tracks) - len(display_tracks) + 1 if args.tail else 1
 
-for i, track in enumerate(display_tracks, start_idx):
-    title = track.get("title", "Unknown")
-    artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
-    songs_table.add_row(str(i), title, artists)
+    for i, track in enumerate(display_tracks, start_idx):
+        title = track.get("title", "Unknown")
+        artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
+        songs_table.add_row(str(i), title, artists)
 
-console.print(songs_table)
+    console.print(songs_table)
@@ -0,0 +1,177 @@
+import atexit
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+
+from rich.table import Table
+
+
+def add_profile_args(parser):
+    """Add --profile options to a script's argument parser."""
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile.json",
+        metavar="FILE",
+        help="Report time spent per phase and save it as JSON "
+        "(default file: profile.json)",
+    )
+    parser.add_argument(
+        "--profile-stats",
+        metavar="FILE",
+        help="Save cProfile stats for the CPU-heavy phases "
+        "(view with python -m pstats FILE)",
+    )
+
+
+class Profiler:
+    """Per-phase wall clock, CPU and sleep timer.
+
+    Phases nest, but time is only charged to the innermost one. Time
+    spent outside any phase (plain output, setup between phases) goes to
+    an "other" phase, so the phase totals add up to the whole run. Wall
+    time that is neither CPU nor sleep is reported as wait (mostly
+    network). Interactive phases (waiting for the user to type) are shown
+    but left out of the totals.
+    """
+
+    def __init__(self, console, report_path=None, stats_path=None):
+        self.console = console
+        self.enabled = bool(report_path or stats_path)
+        self.report_path = report_path
+        self.stats_path = stats_path
+        self.phases = {}
+        self.stack = []
+        self.interactive = set()
+        self.cprofile = cProfile.Profile() if stats_path else None
+        self.mark = self.now()
+
+        if self.enabled:
+            atexit.register(self.finish)
+
+    @staticmethod
+    def now():
+        return time.perf_counter(), time.process_time()
+
+    def current(self):
+        """Return the stats of the innermost phase, or of "other"."""
+        name = self.stack[-1] if self.stack else "other"
+        return self.phases.setdefault(
+            name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "sleep": 0.0}
+        )
+
+    def charge(self):
+        """Charge time since the last mark to the current phase."""
+        wall, cpu = self.now()
+        stats = self.current()
+        stats["wall"] += wall - self.mark[0]
+        stats["cpu"] += cpu - self.mark[1]
+        self.mark = (wall, cpu)
+
+    @contextmanager
+    def phase(self, name, cpu_profile=False, interactive=False):
+        """Time a block of code as the named phase."""
+        if not self.enabled:
+            yield
+            return
+
+        if interactive:
+            self.interactive.add(name)
+        self.charge()
+        self.stack.append(name)
+        self.current()["calls"] += 1
+        profiling = cpu_profile and self.cprofile is not None
+        if profiling:
+            self.cprofile.enable()
+        try:
+            yield
+        finally:
+            if profiling:
+                self.cprofile.disable()
+            self.charge()
+            self.stack.pop()
+
+    def sleep(self, seconds):
+        """time.sleep that is counted as sleep time of the current phase."""
+        time.sleep(seconds)
+        if self.enabled:
+            self.current()["sleep"] += seconds
+
+    def finish(self):
+        """Write the report and cProfile stats."""
+        self.charge()
+        timed = {
+            name: stats
+            for name, stats in self.phases.items()
+            if name not in self.interactive
+        }
+        total = sum(s["wall"] for s in timed.values()) or 1.0
+
+        table = Table(title="Profile")
+        table.add_column("Phase")
+        table.add_column("Calls", justify="right")
+        table.add_column("Wall", justify="right")
+        table.add_column("CPU", justify="right")
+        table.add_column("Sleep", justify="right")
+        table.add_column("Wait", justify="right")
+        table.add_column("%", justify="right", style="dim")
+
+        report = {"phases": {}, "totals": {}}
+        for name, stats in self.phases.items():
+            wait = max(0.0, stats["wall"] - stats["cpu"] - stats["sleep"])
+            interactive = name in self.interactive
+            report["phases"][name] = dict(
+                stats, wait=wait, interactive=interactive
+            )
+            table.add_row(
+                f"{name} (interactive)" if interactive else name,
+                str(stats["calls"]) if stats["calls"] else "-",
+                f"{stats['wall']:.2f}s",
+                f"{stats['cpu']:.2f}s",
+                f"{stats['sleep']:.2f}s",
+                f"{wait:.2f}s",
+                "-" if interactive else f"{stats['wall'] / total * 100:.0f}",
+                style="dim" if interactive else None,
+            )
+
+        for key in ("wall", "cpu", "sleep", "wait"):
+            report["totals"][key] = sum(
+                report["phases"][name][key] for name in timed
+            )
+        report["interactive_wall"] = sum(
+            s["wall"] for n, s in self.phases.items() if n in self.interactive
+        )
+        totals = report["totals"]
+        bound = max(("cpu", "sleep", "wait"), key=lambda k: totals[k])
+        bound = {"cpu": "CPU", "sleep": "sleep", "wait": "network"}[bound]
+        report["bound_by"] = bound
+        slowest = max(timed, key=lambda n: timed[n]["wall"], default=None)
+        report["slowest_phase"] = slowest
+
+        summary = (
+            f"Total {totals['wall']:.2f}s: "
+            f"CPU {totals['cpu']:.2f}s, sleep {totals['sleep']:.2f}s, "
+            f"wait {totals['wait']:.2f}s (mostly {bound}-bound, "
+            f"slowest phase: {slowest})"
+        )
+        if self.interactive:
+            summary += (
+                f", plus {report['interactive_wall']:.2f}s waiting for input"
+            )
+
+        self.console.print()
+        self.console.print(table)
+        self.console.print(f"[dim]{summary}[/dim]")
+
+        if self.report_path:
+            with open(self.report_path, "w") as f:
+                json.dump(report, f, indent=4)
+            self.console.print(
+                f"[dim]Saved profile to {self.report_path}[/dim]"
+            )
+        if self.stats_path:
+            self.cprofile.dump_stats(self.stats_path)
+            self.console.print(
+                f"[dim]Saved cProfile stats to {self.stats_path}[/dim]"
+            )
@@ -1,10 +1,17 @@
 import argparse
-import os
-import time
 
 from rich.console import Console
-from rich.table import Table
-from ytmusicapi import YTMusic
+
+from cassette import add_cassette_args, open_ytmusic
+from library import (
+    add_library_args,
+    load_library_index,
+    print_library_table,
+    prompt_playlist,
+    record_playlist_tracks,
+    select_playlist,
+)
+from phase_timer import Profiler, add_profile_args
 
 # Parse arguments
 parser = argparse.ArgumentParser(
@@ -16,55 +23,46 @@ parser.add_argument(
     default=0.5,
     help="Delay between requests in seconds (default: 0.5)",
 )
+add_cassette_args(parser)
+add_library_args(parser, "playlist")
+add_profile_args(parser)
 args = parser.parse_args()
 
+console = Console()
+profiler = Profiler(console, args.profile, args.profile_stats)
+
 # Initialize YTMusic with browser auth
 AUTH_FILE = "browser.json"
 
-if not os.path.exists(AUTH_FILE):
-    raise SystemExit(
-        f"Missing {AUTH_FILE}. Run: ytmusicapi browser\n"
-        "See: https://ytmusicapi.readthedocs.io/en/stable/setup/browser.html"
-    )
-
-yt = YTMusic(AUTH_FILE)
+with profiler.phase("startup"):
+    yt = open_ytmusic(AUTH_FILE, args.record, args.replay, args.replay_speed)
 
-# Fetch all playlists
-playlists = yt.get_library_playlists(limit=None)
-
-# Display with rich table
-console = Console()
-table = Table(title="Your Playlists")
-table.add_column("#", style="dim")
-table.add_column("Playlist Name")
-table.add_column("Songs", justify="right")
-
-for i, playlist in enumerate(playlists, 1):
-    table.add_row(str(i), playlist["title"], str(playlist.get("count", "?")))
-
-console.print(table)
-
-# Prompt user to select a playlist
-while True:
-    try:
-        choice = console.input("\nEnter playlist number to unlike songs from: ")
-        playlist_num = int(choice)
-        if 1 <= playlist_num <= len(playlists):
-            break
-        console.print(
-            f"[red]Please enter a number between 1 and {len(playlists)}[/red]"
+# Load cached playlists and select one by name/ID or from the table
+with profiler.phase("library fetch"):
+    # Recordings always fetch the library so replays can serve it
+    library = load_library_index(
+        yt,
+        refresh=args.refresh_library or bool(args.record),
+        cached=not args.replay,
+    )
+    if args.playlist:
+        selected_playlist = select_playlist(yt, console, library, args.playlist)
+if not args.playlist:
+    with profiler.phase("rendering", cpu_profile=True):
+        print_library_table(console, library)
+    with profiler.phase("prompt", interactive=True):
+        selected_playlist = prompt_playlist(
+            console, library, "Enter playlist number to unlike songs from"
         )
-    except ValueError:
-        console.print("[red]Please enter a valid number[/red]")
-
-selected_playlist = playlists[playlist_num - 1]
 console.print(
     f"\nFetching songs from: [bold]{selected_playlist['title']}[/bold]\n"
 )
 
 # Fetch all playlist tracks
-playlist_data = yt.get_playlist(selected_playlist["playlistId"], limit=None)
-tracks = playlist_data.get("tracks", [])
+with profiler.phase("playlist fetch"):
+    playlist_data = yt.get_playlist(selected_playlist["playlistId"], limit=None)
+    tracks = playlist_data.get("tracks", [])
+    record_playlist_tracks(console, library, selected_playlist, tracks)
 
 if not tracks:
     raise SystemExit("[red]No tracks found in this playlist[/red]")
@@ -76,30 +74,32 @@ console.print(
     f"[yellow]WARNING: This will unlike all {len(tracks)} songs from "
     f"'{selected_playlist['title']}'[/yellow]"
 )
-confirm = (
-    console.input("\nAre you sure you want to continue? (y/N): ")
-    .strip()
-    .lower()
-)
+with profiler.phase("prompt", interactive=True):
+    confirm = (
+        console.input("\nAre you sure you want to continue? (y/N): ")
+        .strip()
+        .lower()
+    )
 
 if confirm not in ("y", "yes"):
     console.print("[dim]Cancelled. No songs were unliked.[/dim]")
     raise SystemExit(0)
 
 # Unlike all songs in reverse order
-for i, track in enumerate(reversed(tracks), 1):
-    title = track.get("title", "Unknown")
-    artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
-    video_id = track.get("videoId")
+with profiler.phase("unlike loop"):
+    for i, track in enumerate(reversed(tracks), 1):
+        title = track.get("title", "Unknown")
+        artists = ", ".join(a["name"] for a in track.get("artists", []) if a)
+        video_id = track.get("videoId")
 
-    if not video_id:
-        console.print(f"[yellow]Skipping {title} (no video ID)[/yellow]")
-        continue
+        if not video_id:
+            console.print(f"[yellow]Skipping {title} (no video ID)[/yellow]")
+            continue
 
-    console.print(
-        f"[{i}/{len(tracks)}] Unliking: [bold]{title}[/bold] by {artists}"
-    )
-    yt.rate_song(video_id, "INDIFFERENT")
-    time.sleep(args.delay)
+        console.print(
+            f"[{i}/{len(tracks)}] Unliking: [bold]{title}[/bold] by {artists}"
+        )
+        yt.rate_song(video_id, "INDIFFERENT")
+        profiler.sleep(args.delay)
 
 console.print(f"\n[green]Done! Unliked {len(tracks)} songs.[/green]")